@@ -0,0 +1,59 @@
+"""
+Per-worker buffer for page-view counts.
+
+Hits are aggregated in memory and handed to a flush callback in one batch,
+either every `interval` seconds or as soon as `max_hits` are pending, and
+once more when the worker exits.
+"""
+import atexit
+import threading
+from collections import Counter
+from workers import LazyWorkerThread
+
+
+class ViewCounter:
+    def __init__(self, flush_fn, interval: float = 30, max_hits: int = 200):
+        self.flush_fn = flush_fn    # called with {post_id: increment}
+        self.interval = interval
+        self.max_hits = max_hits
+        self._counts = Counter()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._worker = LazyWorkerThread(self._run, "view-counter")
+        atexit.register(self.flush)
+
+    def hit(self, post_id: int) -> None:
+        with self._lock:
+            self._counts[post_id] += 1
+            self._pending += 1
+            full = self._pending >= self.max_hits
+        self._worker.ensure_started()
+        if full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write out everything buffered so far. Returns the number of hits flushed."""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._pending = 0
+        if not counts:
+            return 0
+        try:
+            self.flush_fn(dict(counts))
+        except Exception:
+            # Keep the hits for the next attempt rather than losing them
+            with self._lock:
+                self._counts.update(counts)
+                self._pending += sum(counts.values())
+            raise
+        return sum(counts.values())
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print("VIEW FLUSH ERROR:", repr(e))
@@ -1,25 +1,42 @@
 from datetime import date, datetime
-from flask import Flask, render_template, redirect, url_for, abort, request, flash, jsonify, Response
+from flask import Flask, render_template, redirect, url_for, abort, request, flash, jsonify, Response, g, has_app_context
 from flask_bootstrap import Bootstrap5
 from flask_ckeditor import CKEditor
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as FlaskSQLAlchemySession
 from sqlalchemy.orm import relationship, DeclarativeBase, Mapped, mapped_column, joinedload
-from sqlalchemy import Integer, String, Text
+from sqlalchemy import Integer, String, Text, Float, Index, delete, insert, update, or_, func, event, inspect, text, bindparam
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.engine import make_url
 from flask_login import UserMixin, login_user, LoginManager, current_user, logout_user
-from functools import wraps
+from functools import wraps, lru_cache
 from dotenv import load_dotenv
+import click
 from werkzeug.security import check_password_hash
 from werkzeug.utils import secure_filename
 from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.middleware.proxy_fix import ProxyFix
 import shutil
 import smtplib
 from email.message import EmailMessage
 from PIL import Image
 from io import BytesIO
+from collections import Counter
+import html
+import json
+import math
 import os
 import re
+import time
 import uuid
 import base64
+import hashlib
+from ratelimit import RatePolicy, TokenBucketLimiter
+from analytics import ViewCounter
+from uploads import SpooledUploadRequest
+from profiler import RequestProfiler
+from cleanup import FileCleanupQueue
 
 # Load environment variables
 load_dotenv()
@@ -46,9 +63,36 @@ Bootstrap5(app)
 
 # Image Upload Config
 app.config['MAX_CONTENT_LENGTH'] = 72 * 1024 * 1024  # 72 MB limit
+# Per-field limits, enforced while the upload streams to a temp file (see uploads.py)
+app.config['UPLOAD_FIELD_LIMITS'] = {
+    "cover_image": 40 * 1024 * 1024,
+    "upload": 10 * 1024 * 1024,  # CKEditor inline images
+    "file": 10 * 1024 * 1024,
+}
+app.config['UPLOAD_DEFAULT_LIMIT'] = 10 * 1024 * 1024
+app.config['UPLOAD_SPOOL_DIR'] = os.environ.get("UPLOAD_SPOOL_DIR")
+# Inline images touched this recently may sit in an unsaved editor draft, so cleanup keeps them
+app.config['INLINE_CLEANUP_GRACE'] = int(os.environ.get("INLINE_CLEANUP_GRACE", 24 * 60 * 60))
+app.request_class = SpooledUploadRequest
 UPLOADS_DIR = os.path.join(app.root_path, 'static', 'uploads')
 os.makedirs(UPLOADS_DIR, exist_ok=True)
 
+# Rate limiting for CPU/SMTP heavy endpoints ("<requests>/<seconds>" per client IP)
+app.config['RATE_LIMIT_ENABLED'] = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() == "true"
+app.config['RATE_LIMIT_DB'] = os.environ.get("RATE_LIMIT_DB", os.path.join(app.instance_path, "ratelimit.db"))
+# Number of trusted reverse proxies in front of the app (Nginx in production).
+# ProxyFix takes the client address from the entry those proxies appended to
+# X-Forwarded-For, never from the client-controlled leftmost entry.
+app.config['TRUSTED_PROXY_HOPS'] = int(os.environ.get(
+    "TRUSTED_PROXY_HOPS", 1 if os.environ.get("WF_ENV") == "production" else 0
+))
+if app.config['TRUSTED_PROXY_HOPS'] > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXY_HOPS'])
+rate_limiter = TokenBucketLimiter(app.config['RATE_LIMIT_DB'], {
+    "login": RatePolicy.parse(os.environ.get("RATE_LIMIT_LOGIN", "5/60")),
+    "contact": RatePolicy.parse(os.environ.get("RATE_LIMIT_CONTACT", "3/300")),
+})
+
 # Configure Login
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -61,9 +105,75 @@ def load_user(user_id):
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
+def _sqlite_read_only_uri(uri: str) -> str | None:
+    """Same SQLite file opened read-only (sqlite:///file:<path>?mode=ro&uri=true)."""
+    url = make_url(uri)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return None
+    if url.query.get("uri"):
+        return None
+    return url.set(database=f"file:{url.database}", query={"mode": "ro", "uri": "true"}).render_as_string(hide_password=False)
+
+# Database profile: "production" tunes SQLite and routes read-only views to a "read" bind
+app.config['DB_PROFILE'] = os.environ.get(
+    "DB_PROFILE", "production" if os.environ.get("WF_ENV") == "production" else "default"
+)
+if app.config['DB_PROFILE'] == "production":
+    # Pools are per worker process, so size them for the threads of one worker
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", 4)),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 4)),
+        "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", 10)),
+    }
+    if make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name() != "sqlite":
+        # Server databases drop idle connections; file SQLite connections never go stale
+        app.config['SQLALCHEMY_ENGINE_OPTIONS']["pool_recycle"] = 1800
+    read_uri = os.environ.get("DB_READ_URI") or _sqlite_read_only_uri(app.config['SQLALCHEMY_DATABASE_URI'])
+    if read_uri:
+        app.config['SQLALCHEMY_BINDS'] = {"read": read_uri}
+
+def _sqlite_pragmas(primary: bool):
+    def on_connect(dbapi_conn, connection_record):
+        cur = dbapi_conn.cursor()
+        if primary:
+            cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute(f"PRAGMA busy_timeout={int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}")
+        cur.execute(f"PRAGMA cache_size=-{int(os.environ.get('SQLITE_CACHE_KB', 64000))}")
+        cur.execute(f"PRAGMA mmap_size={int(os.environ.get('SQLITE_MMAP_BYTES', 256 * 1024 * 1024))}")
+        cur.close()
+    return on_connect
+
+class ReadWriteSession(FlaskSQLAlchemySession):
+    """Send queries of @read_only views to the "read" bind; flushes always go to the primary."""
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and has_app_context()
+            and g.get("db_read_only")
+            and "read" in self._db.engines
+        ):
+            return self._db.engines["read"]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(model_class=Base, session_options={"class_": ReadWriteSession})
 db.init_app(app)
 
+if app.config['DB_PROFILE'] == "production":
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            if engine.dialect.name == "sqlite":
+                event.listen(engine, "connect", _sqlite_pragmas(primary=(bind_key != "read")))
+
+# Read-only view decorator (queries may be served by the read bind)
+def read_only(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.db_read_only = True
+        return f(*args, **kwargs)
+    return decorated_function
+
 # Many-to-many table
 post_categories = db.Table(
     "post_categories",
@@ -91,6 +201,11 @@ class BlogPost(db.Model):
     img_url: Mapped[str] = mapped_column(String(250), nullable=False)
     slug: Mapped[str] = mapped_column(String(250), unique=True, nullable=False)
     reading_time: Mapped[int] = mapped_column(Integer, nullable=True)
+    cover_hash: Mapped[str] = mapped_column(String(64), nullable=True)  # sha256 of the uploaded cover
+    body_html: Mapped[str] = mapped_column(Text, nullable=True)  # body after render_post_body()
+    body_render_version: Mapped[int] = mapped_column(Integer, nullable=True)
+    views: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    term_counts: Mapped[str] = mapped_column(Text, nullable=True)  # JSON {term: count} of the body, see index_post_terms()
 
     categories = relationship("Category", secondary=post_categories, back_populates="posts")
 
@@ -113,6 +228,17 @@ class PostSource(db.Model):
 
     post = relationship("BlogPost", back_populates="sources")
 
+# Precomputed "related posts" (filled at write time, read with one indexed query)
+class RelatedPost(db.Model):
+    __tablename__ = "related_posts"
+    post_id: Mapped[int] = mapped_column(Integer, db.ForeignKey("blog_posts.id"), primary_key=True)
+    related_id: Mapped[int] = mapped_column(Integer, db.ForeignKey("blog_posts.id"), primary_key=True)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("ix_related_posts_post_score", "post_id", "score"),
+    )
+
 
 # Admin User table
 class User(UserMixin, db.Model):
@@ -123,14 +249,44 @@ class User(UserMixin, db.Model):
     name: Mapped[str] = mapped_column(String(100))
     posts = relationship("BlogPost", back_populates="author")
 
+def _add_missing_columns() -> None:
+    """db.create_all() never alters existing tables, so add newly declared columns in place."""
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {col["name"] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(db.engine.dialect)}"
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+            try:
+                db.session.execute(text(ddl))
+                db.session.commit()
+            except OperationalError:
+                # Another worker added it first
+                db.session.rollback()
+
 with app.app_context():
     db.create_all()
+    _add_missing_columns()
 
 ALLOWED_EXTS = {'jpg', 'jpeg', 'png', 'webp'}
 
 def _allowed(filename: str) -> bool:
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTS
 
+def _stream_sha256(stream, chunk_size=1024 * 1024) -> str:
+    """Hash a file-like object in chunks and rewind it."""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
 def _to_webp_bytes(pil_img: Image.Image, quality=82) -> bytes:
     out = BytesIO()
     pil_img.save(out, format='WEBP', quality=quality, method=6)
@@ -168,11 +324,15 @@ def save_post_images(file_storage, slug: str) -> dict:
     folder = os.path.join(UPLOADS_DIR, base)
     os.makedirs(folder, exist_ok=True)
 
+    # Pillow reads straight from the spooled temp file
     file_storage.stream.seek(0)
     img = Image.open(file_storage.stream)
     img.verify()
     file_storage.stream.seek(0)
-    img = Image.open(file_storage.stream).convert('RGB')
+    img = Image.open(file_storage.stream)
+    # JPEG: decode at the smallest scale that still covers the hero size
+    img.draft('RGB', (1920, 1080))
+    img = img.convert('RGB')
 
     hero = _resize_cover(img, 1920, 1080)
     thumb = _resize_thumb(img, 600, 400)
@@ -194,50 +354,93 @@ def save_post_images(file_storage, slug: str) -> dict:
         "thumb": f"{public_folder}/thumb.webp",
     }
 
-def delete_post_files(post: BlogPost) -> None:
+_INLINE_SRC_RE = re.compile(r'src=["\'](/static/uploads/inline/[^"\']+)["\']', re.IGNORECASE)
+
+def post_files(posts) -> list[tuple[str, str]]:
     """
-    Remove files that belong to a single post:
-    - Cover folder: /static/uploads/<slug>/
-    - Inline images that are not used by any other post.
+    Files that belong only to the given posts, as cleanup items:
+    - ("cover", slug) for /static/uploads/<slug>/
+    - ("inline", url) for inline images not referenced by any other post
     """
-    # Remove cover folder for this post slug
-    if post.slug:
-        folder_name = secure_filename(post.slug)
-        folder_path = os.path.join(UPLOADS_DIR, folder_name)
-        if os.path.isdir(folder_path):
-            try:
-                shutil.rmtree(folder_path)
-            except OSError:
-                # If something goes wrong, ignore silently
-                pass
-
-    # Remove inline images that are only used in this post
-    body_html = post.body or ""
-    inline_pattern = re.compile(
-        r'src=["\'](/static/uploads/inline/([^"\']+))["\']',
-        re.IGNORECASE
-    )
+    items = [("cover", post.slug) for post in posts if post.slug]
 
-    for match in inline_pattern.finditer(body_html):
-        url_path = match.group(1)  # like /static/uploads/inline/123abc.webp
-        # Check if this exact src appears in any other post
-        still_used = (
-            db.session.query(BlogPost)
-            .filter(BlogPost.id != post.id)
-            .filter(BlogPost.body.contains(url_path))
-            .first()
+    inline = set()
+    for post in posts:
+        inline.update(_INLINE_SRC_RE.findall(post.body or ""))
+    if inline:
+        # One pass over the other bodies instead of a LIKE query per image
+        other_bodies = db.session.scalars(
+            db.select(BlogPost.body).where(BlogPost.id.not_in([post.id for post in posts]))
         )
-        if still_used:
-            continue
+        for body in other_bodies:
+            inline.difference_update(_INLINE_SRC_RE.findall(body or ""))
+    items.extend(("inline", url) for url in sorted(inline))
+    return items
 
-        # Map URL to filesystem path
-        fs_path = os.path.join(app.root_path, url_path.lstrip("/"))
-        if os.path.isfile(fs_path):
+def remove_post_file(item: tuple[str, str]) -> None:
+    """
+    Delete one cleanup item from disk (runs after the commit, off the request path).
+    Re-checks the database first so a file that became referenced again is kept.
+    Inline images are shared by content hash and reuse touches them, so a recently
+    touched one may belong to an unsaved draft and is kept as well.
+    """
+    kind, value = item
+    with app.app_context():
+        if kind == "cover":
+            if db.session.query(BlogPost.id).filter(BlogPost.slug == value).first():
+                return
+            folder_path = os.path.join(UPLOADS_DIR, secure_filename(value))
+            if os.path.isdir(folder_path):
+                shutil.rmtree(folder_path, ignore_errors=True)
+        elif kind == "inline":
+            if db.session.query(BlogPost.id).filter(BlogPost.body.contains(value)).first():
+                return
+            fs_path = os.path.join(app.root_path, value.lstrip("/"))
             try:
+                if time.time() - os.path.getmtime(fs_path) < app.config['INLINE_CLEANUP_GRACE']:
+                    return
                 os.remove(fs_path)
-            except OSError:
+            except FileNotFoundError:
                 pass
 
+file_cleanup = FileCleanupQueue(remove_post_file)
+
+def delete_posts(post_ids) -> list[int]:
+    """
+    Delete posts with their sources, category links and related rows in one transaction.
+    Their files are queued for removal only after the commit succeeded, so a failed
+    delete never leaves rows pointing at missing files. Returns the deleted ids.
+    """
+    posts = db.session.query(BlogPost).filter(BlogPost.id.in_(set(post_ids))).all()
+    if not posts:
+        return []
+    ids = [post.id for post in posts]
+    cleanup_items = post_files(posts)
+
+    no_sync = {"synchronize_session": False}
+    try:
+        remove_related_posts(ids)
+        db.session.execute(delete(post_categories).where(post_categories.c.post_id.in_(ids)))
+        db.session.execute(delete(PostSource).where(PostSource.post_id.in_(ids)), execution_options=no_sync)
+        db.session.execute(delete(BlogPost).where(BlogPost.id.in_(ids)), execution_options=no_sync)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    for post in posts:
+        db.session.expunge(post)
+    file_cleanup.enqueue(cleanup_items)
+    return ids
+
+def _reuse_inline(fpath: str) -> bool:
+    """True if a content-addressed inline image already exists; touches it so cleanup keeps it."""
+    try:
+        os.utime(fpath)
+        return True
+    except FileNotFoundError:
+        return False
+
 def _resize_inline(img: Image.Image, max_w=1600, max_h=1600) -> Image.Image:
     """Keep aspect ratio, fit into max box, no crop."""
     im = img.convert("RGB")
@@ -251,38 +454,44 @@ def save_inline_image(file_storage: FileStorage) -> str:
     if not _allowed(file_storage.filename):
         raise ValueError("Unsupported file type")
 
-    # Per-image size limit (10 MB)
+    # Per-image size limit (also enforced while streaming; this covers non-request callers)
+    max_size = app.config['UPLOAD_FIELD_LIMITS']["upload"]
     file_storage.stream.seek(0, os.SEEK_END)
     size = file_storage.stream.tell()
     file_storage.stream.seek(0)
 
-    if size > 10 * 1024 * 1024:
-        raise ValueError("Image is too large. Please upload an image under 10 MB.")
+    if size > max_size:
+        raise ValueError(f"Image is too large. Please upload an image under {max_size // (1024 * 1024)} MB.")
 
     # 1) Target folder: /static/uploads/inline
     folder = os.path.join(UPLOADS_DIR, "inline")
     os.makedirs(folder, exist_ok=True)
 
-    # 2) Read and validate
-    file_storage.stream.seek(0)
+    # 2) Content-addressed name: the same source image is only encoded once
+    fname = f"{_stream_sha256(file_storage.stream)[:32]}.webp"
+    fpath = os.path.join(folder, fname)
+    if _reuse_inline(fpath):
+        return f"/static/uploads/inline/{fname}"
+
+    # 3) Read and validate
     img = Image.open(file_storage.stream)
     img.verify()
     file_storage.stream.seek(0)
-    img = Image.open(file_storage.stream).convert("RGB")
+    img = Image.open(file_storage.stream)
+    img.draft("RGB", (1600, 1600))
+    img = img.convert("RGB")
 
-    # 3) Resize to fit (max 1600px edge) and save webp
+    # 4) Resize to fit (max 1600px edge) and save webp
     out_img = _resize_inline(img, 1600, 1600)
-    fname = f"{uuid.uuid4().hex}.webp"
-    fpath = os.path.join(folder, fname)
     with open(fpath, "wb") as f:
         f.write(_to_webp_bytes(out_img, quality=82))
 
-    # 4) Return public URL
+    # 5) Return public URL
     return f"/static/uploads/inline/{fname}"
 
 def replace_base64_images_with_files(html: str) -> str:
     """Convert <img src="data:image/...;base64, ..."> to files under /static/uploads/inline/ and replace src."""
-    if not html:
+    if not html or "data:image" not in html:
         return html
 
     # png|jpg|jpeg|webp|gif  (+ whitespace tolerant base64)
@@ -298,6 +507,13 @@ def replace_base64_images_with_files(html: str) -> str:
         except Exception:
             return m.group(0)
 
+        # Content-addressed name: identical images are only encoded once
+        folder = os.path.join(UPLOADS_DIR, "inline")
+        fname = f"{hashlib.sha256(raw).hexdigest()[:32]}.webp"
+        url = f"/static/uploads/inline/{fname}"
+        if _reuse_inline(os.path.join(folder, fname)):
+            return f'src="{url}"'
+
         try:
             img = Image.open(BytesIO(raw))
             if img.mode != "RGB":
@@ -306,18 +522,348 @@ def replace_base64_images_with_files(html: str) -> str:
             return m.group(0)
 
         out = _resize_inline(img, 1600, 1600)
-        folder = os.path.join(UPLOADS_DIR, "inline")
         os.makedirs(folder, exist_ok=True)
-        fname = f"{uuid.uuid4().hex}.webp"
         with open(os.path.join(folder, fname), "wb") as f:
             f.write(_to_webp_bytes(out, quality=82))
 
-        url = f"/static/uploads/inline/{fname}"
         return f'src="{url}"'
 
     return pattern.sub(_save_and_replace, html)
 
 
+# Related posts (category overlap + TF-IDF over plain-text bodies)
+RELATED_LIMIT = 3
+RELATED_CATEGORY_WEIGHT = 0.4
+RELATED_TEXT_WEIGHT = 0.6
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"[^\W\d_]{3,}")
+_STOPWORDS = frozenset("""
+    the and for are but not you all any can had her was one our out has him his how its may new now
+    old see two who did get let say she too use that with have this will your from they been than
+    them then were what when which while into also some more most such only over very just about
+    there their these those would could should other after before where being because between
+""".split())
+
+def _plain_text(body_html: str) -> str:
+    """Strip tags and entities from a post body."""
+    return html.unescape(_TAG_RE.sub(" ", body_html or ""))
+
+def _tokenize(text: str) -> list[str]:
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+
+def _tfidf_vectors(docs: dict[int, Counter]) -> dict[int, dict[str, float]]:
+    """Build L2-normalized TF-IDF vectors keyed by post id."""
+    n_docs = len(docs)
+    doc_freq = Counter()
+    for terms in docs.values():
+        doc_freq.update(terms.keys())
+
+    vectors = {}
+    for post_id, terms in docs.items():
+        total = sum(terms.values()) or 1
+        vec = {
+            term: (count / total) * (math.log((1 + n_docs) / (1 + doc_freq[term])) + 1)
+            for term, count in terms.items()
+        }
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        vectors[post_id] = {term: v / norm for term, v in vec.items()}
+    return vectors
+
+def index_post_terms(post: "BlogPost") -> None:
+    """Store the body's term counts, so related posts never re-tokenize unchanged bodies."""
+    post.term_counts = json.dumps(Counter(_tokenize(_plain_text(post.body))))
+
+def _load_related_corpus(exclude_ids=()):
+    """Return (term counts, categories) for all posts, optionally skipping some ids."""
+    exclude_ids = set(exclude_ids)
+    docs = {}
+    unindexed = []
+    for pid, terms in db.session.execute(db.select(BlogPost.id, BlogPost.term_counts)):
+        if pid in exclude_ids:
+            continue
+        if terms is None:
+            unindexed.append(pid)
+        else:
+            docs[pid] = Counter(json.loads(terms))
+    if unindexed:
+        # Posts saved before term_counts existed (`flask rebuild-related` stores them)
+        rows = db.session.execute(db.select(BlogPost.id, BlogPost.body).where(BlogPost.id.in_(unindexed)))
+        docs.update((pid, Counter(_tokenize(_plain_text(body)))) for pid, body in rows)
+
+    cats = {pid: set() for pid in docs}
+    links = db.session.execute(db.select(post_categories.c.post_id, post_categories.c.category_id))
+    for pid, cid in links:
+        if pid in cats:
+            cats[pid].add(cid)
+
+    return docs, cats
+
+def _related_score(a, b, vectors, cats) -> float:
+    cats_a, cats_b = cats[a], cats[b]
+    union = cats_a | cats_b
+    overlap = len(cats_a & cats_b) / len(union) if union else 0.0
+
+    vec_a, vec_b = vectors[a], vectors[b]
+    if len(vec_a) > len(vec_b):
+        vec_a, vec_b = vec_b, vec_a
+    cosine = sum(v * vec_b.get(term, 0.0) for term, v in vec_a.items())
+
+    return RELATED_CATEGORY_WEIGHT * overlap + RELATED_TEXT_WEIGHT * cosine
+
+def _top_related(post_id, vectors, cats) -> list[tuple[float, int]]:
+    """Top-N (score, related_id) for a single post."""
+    scored = [
+        (_related_score(post_id, other, vectors, cats), other)
+        for other in vectors if other != post_id
+    ]
+    return sorted((item for item in scored if item[0] > 0), reverse=True)[:RELATED_LIMIT]
+
+def _store_related(post_id: int, top: list[tuple[float, int]]) -> None:
+    """Replace the stored top-N related posts for a single post."""
+    db.session.execute(delete(RelatedPost).where(RelatedPost.post_id == post_id))
+    if top:
+        db.session.execute(
+            insert(RelatedPost),
+            [{"post_id": post_id, "related_id": other, "score": score} for score, other in top]
+        )
+
+def update_related_posts(post: "BlogPost") -> None:
+    """
+    Incrementally refresh related_posts after a post is created or edited.
+    Only posts whose top-N list can change are recomputed:
+    - the post itself
+    - posts that currently list it
+    - posts it now scores higher against than their weakest stored entry
+    Scoring only reads (stored term counts, no autoflush), so the SQLite write lock is
+    taken by the flush afterwards and held just for the row rewrites. Call it before
+    the caller's changes are flushed; it flushes them and writes in the same transaction.
+    """
+    with db.session.no_autoflush:
+        # A new post has no id yet: score it under the key None
+        key = post.id
+        docs, cats = _load_related_corpus(exclude_ids=[key] if key is not None else ())
+        docs[key] = Counter(json.loads(post.term_counts or "{}"))
+        cats[key] = {cat.id for cat in post.categories}
+        vectors = _tfidf_vectors(docs)
+
+        affected = {key}
+        floors_query = (
+            db.select(RelatedPost.post_id, func.count(), func.min(RelatedPost.score))
+            .group_by(RelatedPost.post_id)
+        )
+        if key is not None:
+            affected.update(db.session.scalars(
+                db.select(RelatedPost.post_id).where(RelatedPost.related_id == key)
+            ))
+            # Rows pointing at this post are rewritten below, so they don't count as a floor
+            floors_query = floors_query.where(RelatedPost.related_id != key)
+        floors = {pid: (count, lowest) for pid, count, lowest in db.session.execute(floors_query)}
+
+        for other in vectors:
+            if other == key or other in affected:
+                continue
+            score = _related_score(key, other, vectors, cats)
+            count, lowest = floors.get(other, (0, 0.0))
+            if score > 0 and (count < RELATED_LIMIT or score > lowest):
+                affected.add(other)
+
+        tops = {pid: _top_related(pid, vectors, cats) for pid in affected if pid in vectors}
+
+    db.session.flush()
+    post_id = post.id
+    db.session.execute(delete(RelatedPost).where(
+        or_(RelatedPost.post_id == post_id, RelatedPost.related_id == post_id)
+    ))
+    for pid, top in tops.items():
+        top = [(score, post_id if other is None else other) for score, other in top]
+        _store_related(post_id if pid is None else pid, top)
+
+def remove_related_posts(post_ids) -> None:
+    """
+    Drop related_posts rows for posts about to be deleted and refill the lists that pointed at them.
+    Runs inside the caller's transaction, before the posts themselves are deleted.
+    """
+    post_ids = set(post_ids)
+    affected = set(db.session.scalars(
+        db.select(RelatedPost.post_id).where(RelatedPost.related_id.in_(post_ids))
+    )) - post_ids
+    db.session.execute(delete(RelatedPost).where(
+        or_(RelatedPost.post_id.in_(post_ids), RelatedPost.related_id.in_(post_ids))
+    ))
+    if affected:
+        docs, cats = _load_related_corpus(exclude_ids=post_ids)
+        vectors = _tfidf_vectors(docs)
+        for pid in affected:
+            if pid in vectors:
+                _store_related(pid, _top_related(pid, vectors, cats))
+
+def rebuild_related_posts() -> int:
+    """
+    Recompute the whole related_posts table (storing term counts of posts that have none).
+    Returns the number of posts processed.
+    """
+    for post in db.session.scalars(db.select(BlogPost).where(BlogPost.term_counts.is_(None))):
+        index_post_terms(post)
+    db.session.flush()
+    docs, cats = _load_related_corpus()
+    vectors = _tfidf_vectors(docs)
+    db.session.execute(delete(RelatedPost))
+    for pid in vectors:
+        _store_related(pid, _top_related(pid, vectors, cats))
+    return len(vectors)
+
+
+# Write-time body rendering (stored in BlogPost.body_html, served as-is by post.html)
+BODY_RENDER_VERSION = 3  # bump when render_post_body changes, then run `flask rerender-posts`
+POST_TOC_ENABLED = os.environ.get("POST_TOC", "true").lower() == "true"
+POST_TOC_MIN_HEADINGS = 3
+
+# One attribute token: name and optional value (quoted values are consumed whole)
+_ATTR_NAME = r"[a-zA-Z_:][-a-zA-Z0-9_:.]*"
+_ATTR_VALUE = r"\"[^\"]*\"|'[^']*'|[^\s\"'>]+"
+_ATTR_RE = re.compile(rf"\s+({_ATTR_NAME})(?:\s*=\s*({_ATTR_VALUE}))?")
+# Tags are read attribute by attribute, so a ">" inside a quoted value doesn't end them
+_ATTRS = rf"(?:\s+{_ATTR_NAME}(?:\s*=\s*(?:{_ATTR_VALUE}))?)*"
+_IMG_TAG_RE = re.compile(r"<img\b" + _ATTRS + r"\s*/?>", re.IGNORECASE)
+_OPEN_TAG_RE = re.compile(r"<[a-zA-Z][-a-zA-Z0-9]*" + _ATTRS + r"\s*/?>")
+_EDITOR_ATTR_NAME_RE = re.compile(r"data-cke?-[-a-z0-9]*|contenteditable|spellcheck", re.IGNORECASE)
+_EMPTY_P_RE = re.compile(r"<p>(?:\s|&nbsp;|\u00a0|\u200b|<br\s*/?>)*</p>", re.IGNORECASE)
+_HEADING_RE = re.compile(r"<(h[23])(" + _ATTRS + r")\s*>(.*?)</\1>", re.IGNORECASE | re.DOTALL)
+
+@lru_cache(maxsize=4096)
+def _stored_image_size(fs_path: str) -> tuple[int, int]:
+    # Raises for a missing file, and lru_cache never caches exceptions
+    with Image.open(fs_path) as img:
+        return img.size
+
+def _inline_image_size(url_path: str) -> tuple[int, int] | None:
+    """Intrinsic size of a stored inline WebP (content-addressed, so safe to cache once found)."""
+    try:
+        return _stored_image_size(os.path.join(app.root_path, url_path.lstrip("/")))
+    except (OSError, ValueError):
+        return None
+
+def _tag_attr_names(tag: str) -> set[str]:
+    return {m.group(1).lower() for m in _ATTR_RE.finditer(tag)}
+
+def _tag_attr_value(tag: str, name: str) -> str | None:
+    for m in _ATTR_RE.finditer(tag):
+        if m.group(1).lower() == name:
+            value = m.group(2) or ""
+            return value[1:-1] if value[:1] in ("'", '"') else value
+    return None
+
+def _strip_editor_attrs(m: re.Match) -> str:
+    """Drop CKEditor-only attributes by name; attribute values are never searched."""
+    return _ATTR_RE.sub(
+        lambda a: "" if _EDITOR_ATTR_NAME_RE.fullmatch(a.group(1)) else a.group(0),
+        m.group(0)
+    )
+
+def _enhance_img(m: re.Match) -> str:
+    tag = m.group(0)
+    names = _tag_attr_names(tag)
+    extra = []
+
+    src = _tag_attr_value(tag, "src")
+    if src and src.startswith("/static/uploads/inline/") and not names & {"width", "height"}:
+        size = _inline_image_size(src)
+        if size:
+            extra.append(f'width="{size[0]}" height="{size[1]}"')
+    if "loading" not in names:
+        extra.append('loading="lazy"')
+    if "decoding" not in names:
+        extra.append('decoding="async"')
+
+    if not extra:
+        return tag
+    end = -2 if tag.endswith("/>") else -1
+    return f"{tag[:end].rstrip()} {' '.join(extra)}{tag[end:]}"
+
+def _add_toc(body: str) -> str:
+    """Give h2/h3 headings ids and prepend a table of contents when there are enough of them."""
+    headings = []
+    # Reserve explicit ids up front so generated anchors never clash with later ones
+    used_ids = {
+        value for value in (_tag_attr_value(t, "id") for t in _OPEN_TAG_RE.findall(body)) if value
+    }
+
+    def _anchor(m: re.Match) -> str:
+        tag, attrs, inner = m.group(1).lower(), m.group(2) or "", m.group(3)
+        label = html.unescape(_TAG_RE.sub("", inner)).strip()
+        if not label:
+            return m.group(0)
+        existing = _tag_attr_value(f"<{tag}{attrs}>", "id")
+        if existing:
+            anchor = existing
+        else:
+            base = generate_slug(label) or "section"
+            anchor, n = base, 2
+            while anchor in used_ids:
+                anchor, n = f"{base}-{n}", n + 1
+            attrs = f' id="{anchor}"{attrs}'
+        used_ids.add(anchor)
+        headings.append((tag, anchor, label))
+        return f"<{tag}{attrs}>{inner}</{tag}>"
+
+    body = _HEADING_RE.sub(_anchor, body)
+    if len(headings) < POST_TOC_MIN_HEADINGS:
+        return body
+
+    items = "".join(
+        f'<li class="wf-toc-{tag}"><a href="#{anchor}">{html.escape(label)}</a></li>'
+        for tag, anchor, label in headings
+    )
+    return f'<nav class="wf-toc" aria-label="Table of contents"><ul>{items}</ul></nav>{body}'
+
+def render_post_body(body: str) -> str:
+    """
+    Transform editor HTML once at save time:
+    strip CKEditor cruft, add lazy-loading and intrinsic sizes to images, optionally build a TOC.
+    """
+    if not body:
+        return body
+    out = _OPEN_TAG_RE.sub(_strip_editor_attrs, body)
+    out = _EMPTY_P_RE.sub("", out).replace("\u200b", "")
+    out = _IMG_TAG_RE.sub(_enhance_img, out)
+    if POST_TOC_ENABLED:
+        out = _add_toc(out)
+    return out
+
+def apply_rendered_body(post: "BlogPost") -> None:
+    post.body_html = render_post_body(post.body)
+    post.body_render_version = BODY_RENDER_VERSION
+
+
+# Page views (buffered per worker, written in batches)
+def _flush_views(counts: dict[int, int]) -> None:
+    stmt = (
+        update(BlogPost.__table__)
+        .where(BlogPost.__table__.c.id == bindparam("b_post_id"))
+        .values(views=BlogPost.__table__.c.views + bindparam("b_increment"))
+    )
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(stmt, [{"b_post_id": pid, "b_increment": n} for pid, n in counts.items()])
+
+app.config['VIEW_COUNTING_ENABLED'] = os.environ.get("VIEW_COUNTING", "true").lower() == "true"
+view_counter = ViewCounter(
+    _flush_views,
+    interval=float(os.environ.get("VIEW_FLUSH_SECONDS", 30)),
+    max_hits=int(os.environ.get("VIEW_FLUSH_HITS", 200)),
+)
+
+def most_read_posts(limit: int = 10) -> list:
+    """Posts ordered by stored view count (admin stats, cache warm-up)."""
+    return (
+        db.session.query(BlogPost)
+        .filter(BlogPost.views > 0)
+        .order_by(BlogPost.views.desc(), BlogPost.id.desc())
+        .limit(limit)
+        .all()
+    )
+
 def _smtp_send(msg, host, port, user, pwd, security):
     if str(security).upper() == "SSL" or str(port) == "465":
         with smtplib.SMTP_SSL(host, int(port), timeout=20) as s:
@@ -410,6 +956,26 @@ def send_contact_mail(name: str, email: str, subject: str, message: str):
         _smtp_send(ack, smtp_host, smtp_port, smtp_user, smtp_pass, security)
 
 
+# Request profiler (toggled by the admin at /admin/profiler, shared by all workers)
+profiler = RequestProfiler(
+    directory=os.environ.get("PROFILE_DIR", os.path.join(app.instance_path, "profiles")),
+    state_path=os.path.join(app.instance_path, "profiler.json"),
+    max_bytes=int(os.environ.get("PROFILE_MAX_MB", 50)) * 1024 * 1024,
+)
+
+@app.before_request
+def start_profiling():
+    if request.endpoint in ("static", "profiler_admin"):
+        return
+    if profiler.should_profile(request.endpoint):
+        g.profiler_sampler = profiler.start()
+
+@app.teardown_request
+def finish_profiling(exc):
+    sampler = g.pop("profiler_sampler", None)
+    if sampler is not None:
+        profiler.finish(sampler, request.endpoint)
+
 # Admin-only decorator
 def admin_only(f):
     @wraps(f)
@@ -419,12 +985,30 @@ def admin_only(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def _client_ip() -> str:
+    # Already resolved by ProxyFix when running behind trusted proxies
+    return request.remote_addr or "unknown"
+
+# Rate limit decorator (POST only), rejects before the view does any work
+def rate_limited(route):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method == "POST" and app.config['RATE_LIMIT_ENABLED']:
+                allowed, retry_after = rate_limiter.hit(route, _client_ip())
+                if not allowed:
+                    return abort(429, retry_after=math.ceil(retry_after))
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
 def generate_slug(title):
     slug = re.sub(r'[\W_]+', '-', title.lower())
     return slug.strip('-')
 
 # ROUTES
 @app.route('/')
+@read_only
 def get_all_posts():
     LIMIT = 10
     base_query = (
@@ -450,6 +1034,7 @@ def get_all_posts():
     )
 
 @app.route("/<string:slug>")
+@read_only
 def show_post(slug):
     requested_post = (
         db.session.query(BlogPost)
@@ -464,13 +1049,35 @@ def show_post(slug):
     if not requested_post:
         abort(404)
 
-    return render_template("post.html", post=requested_post, current_user=current_user)
+    # Count the view in memory; flushed to the DB in batches
+    if app.config['VIEW_COUNTING_ENABLED'] and not (current_user.is_authenticated and current_user.id == 1):
+        view_counter.hit(requested_post.id)
+
+    # Precomputed related posts (single query on the related_posts index)
+    related_posts = (
+        db.session.query(BlogPost)
+        .join(RelatedPost, RelatedPost.related_id == BlogPost.id)
+        .filter(RelatedPost.post_id == requested_post.id)
+        .order_by(RelatedPost.score.desc())
+        .limit(RELATED_LIMIT)
+        .all()
+    )
+
+    return render_template(
+        "post.html",
+        post=requested_post,
+        related_posts=related_posts,
+        current_user=current_user
+    )
 
 from forms import CreatePostForm
 from forms import ContactForm
+from forms import ProfilerForm
+from forms import BulkDeleteForm
 
 
 @app.route("/filter-posts/<int:category_id>")
+@read_only
 def filter_posts(category_id):
     try:
         offset = int(request.args.get("offset", 0))
@@ -507,6 +1114,7 @@ def filter_posts(category_id):
     return {"html": html, "has_more": has_more}
 
 @app.route("/ultra-secret-login", methods=["GET", "POST"])
+@rate_limited("login")
 def secret_login():
     if request.method == "POST":
         email = request.form.get("email")
@@ -542,12 +1150,14 @@ def add_new_post():
 
         # Cover image (hero/thumb) handling
         img_url_value = form.img_url.data or ""
+        cover_hash = None
         file_storage: FileStorage = request.files.get('cover_image')
         if file_storage and file_storage.filename:
             try:
                 saved = save_post_images(file_storage, post_slug)
                 if saved.get("hero"):
                     img_url_value = saved["hero"]
+                    cover_hash = _stream_sha256(file_storage.stream)
             except Exception as e:
                 flash(f"Image upload failed: {e}")
                 return redirect(url_for("add_new_post"))
@@ -565,8 +1175,11 @@ def add_new_post():
             date=date.today().strftime("%b %d, %Y"),
             slug=post_slug,
             categories=selected_categories,
-            reading_time = form.reading_time.data
+            reading_time = form.reading_time.data,
+            cover_hash=cover_hash
         )
+        apply_rendered_body(new_post)
+        index_post_terms(new_post)
 
         # Build sources from FieldList (label required to persist; URL optional)
         order_idx = 0
@@ -579,6 +1192,7 @@ def add_new_post():
             order_idx += 1
 
         db.session.add(new_post)
+        update_related_posts(new_post)
         db.session.commit()
         return redirect(url_for("get_all_posts"))
 
@@ -611,44 +1225,70 @@ def edit_post(post_id):
             form.sources.append_entry()
 
     if form.validate_on_submit():
-        # Update basic fields
-        post.title = form.title.data
-        post.subtitle = form.subtitle.data
-        post.img_url = form.img_url.data or post.img_url
-        post.reading_time = form.reading_time.data
-
-        # Convert any base64 inline images to files as well on edit
-        post.body = replace_base64_images_with_files(form.body.data)
-
-        # Update categories
-        post.categories = (
-            db.session.query(Category)
-            .filter(Category.id.in_(form.categories.data))
-            .all()
-        )
-
-        # Replace hero if a new cover uploaded
-        file_storage: FileStorage = request.files.get('cover_image')
-        if file_storage and file_storage.filename:
-            try:
-                saved = save_post_images(file_storage, post.slug or generate_slug(post.title))
-                if saved.get("hero"):
-                    post.img_url = saved["hero"]
-            except Exception as e:
-                flash(f"Image upload failed: {e}")
-                return redirect(url_for("edit_post", post_id=post.id))
-
-        # Replace sources atomically (clear + rebuild)
-        post.sources.clear()
-        order_idx = 0
-        for subform in form.sources.entries:
-            lbl = (subform.form.label.data or "").strip()
-            url = (subform.form.url.data or "").strip()
-            if not lbl:
-                continue
-            post.sources.append(PostSource(order=order_idx, label=lbl, url=(url or None)))
-            order_idx += 1
-
+        # No autoflush while applying the form: nothing is written (and no SQLite write
+        # lock is held) until update_related_posts() / commit flush everything at once
+        with db.session.no_autoflush:
+            # Update basic fields (unchanged values emit no UPDATE)
+            post.title = form.title.data
+            post.subtitle = form.subtitle.data
+            post.img_url = form.img_url.data or post.img_url
+            post.reading_time = form.reading_time.data
+
+            # Body: only re-process when the submitted HTML actually changed
+            body_changed = form.body.data != post.body
+            if body_changed:
+                # Convert any base64 inline images to files as well on edit
+                post.body = replace_base64_images_with_files(form.body.data)
+                index_post_terms(post)
+            if body_changed or post.body_render_version != BODY_RENDER_VERSION:
+                apply_rendered_body(post)
+
+            # Categories: touch the link table only for added/removed ids
+            new_category_ids = set(form.categories.data or [])
+            current_category_ids = {cat.id for cat in post.categories}
+            categories_changed = new_category_ids != current_category_ids
+            if categories_changed:
+                for cat in [c for c in post.categories if c.id not in new_category_ids]:
+                    post.categories.remove(cat)
+                added_ids = new_category_ids - current_category_ids
+                if added_ids:
+                    post.categories.extend(
+                        db.session.query(Category).filter(Category.id.in_(added_ids)).all()
+                    )
+
+            # Replace hero only if the uploaded cover differs from the current one
+            file_storage: FileStorage = request.files.get('cover_image')
+            if file_storage and file_storage.filename:
+                cover_hash = _stream_sha256(file_storage.stream)
+                if cover_hash != post.cover_hash or not post.img_url.endswith("/hero.webp"):
+                    try:
+                        saved = save_post_images(file_storage, post.slug or generate_slug(post.title))
+                        if saved.get("hero"):
+                            post.img_url = saved["hero"]
+                            post.cover_hash = cover_hash
+                    except Exception as e:
+                        flash(f"Image upload failed: {e}")
+                        return redirect(url_for("edit_post", post_id=post.id))
+
+            # Sources: update rows in place by position, append/remove only the difference
+            new_sources = []
+            for subform in form.sources.entries:
+                lbl = (subform.form.label.data or "").strip()
+                url = (subform.form.url.data or "").strip()
+                if lbl:
+                    new_sources.append((lbl, url or None))
+
+            if new_sources != [(s.label, s.url) for s in post.sources]:
+                for order_idx, (lbl, url) in enumerate(new_sources):
+                    if order_idx < len(post.sources):
+                        source = post.sources[order_idx]
+                        source.order, source.label, source.url = order_idx, lbl, url
+                    else:
+                        post.sources.append(PostSource(order=order_idx, label=lbl, url=url))
+                del post.sources[len(new_sources):]
+
+        if body_changed or categories_changed:
+            update_related_posts(post)
         db.session.commit()
         return redirect(url_for("show_post", slug=post.slug))
 
@@ -664,7 +1304,7 @@ def upload_image():
         if not fs:
             return jsonify({"error": {"message": "No file part"}}), 400
 
-        # Here we have already set the size limit on Flask and Nginx side
+        # Size limits are enforced while the body streams (Flask) and by Nginx
         url = save_inline_image(fs)
 
         return jsonify({"url": url})
@@ -672,23 +1312,89 @@ def upload_image():
 
     except ValueError as ve:
         return jsonify({"error": {"message": str(ve)}}), 400
+    except RequestEntityTooLarge as e:
+        # Rejected while streaming (per-field or total limit)
+        return jsonify({"error": {"message": e.description}}), 413
     except Exception as e:
         print("UPLOAD ERROR:", repr(e))
         return jsonify({"error": {"message": "Upload failed"}}), 500
 
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    # Post forms: keep the admin on the form with a message instead of a bare 413 page
+    if request.endpoint in ("add_new_post", "edit_post"):
+        flash(f"Image upload failed: {e.description}")
+        return redirect(request.url)
+    return e
+
 @app.route("/delete/<int:post_id>")
 @admin_only
 def delete_post(post_id):
-    post_to_delete = db.get_or_404(BlogPost, post_id)
+    db.get_or_404(BlogPost, post_id)
+    delete_posts([post_id])
+    return redirect(url_for('get_all_posts'))
 
-    # First remove files that belong to this post
-    delete_post_files(post_to_delete)
+@app.route("/admin/posts", methods=["GET", "POST"])
+@admin_only
+def bulk_delete_posts():
+    form = BulkDeleteForm()
+    form.post_ids.choices = [
+        (post_id, f"{title} ({post_date})")
+        for post_id, title, post_date in db.session.execute(
+            db.select(BlogPost.id, BlogPost.title, BlogPost.date).order_by(BlogPost.id.desc())
+        )
+    ]
 
-    # Then remove from database
-    db.session.delete(post_to_delete)
-    db.session.commit()
+    if form.validate_on_submit():
+        deleted = delete_posts(form.post_ids.data)
+        flash(f"Deleted {len(deleted)} post(s).")
+        return redirect(url_for("bulk_delete_posts"))
 
-    return redirect(url_for('get_all_posts'))
+    return render_template("admin-posts.html", form=form, current_user=current_user)
+
+@app.route("/admin/rate-limits")
+@admin_only
+def rate_limit_stats():
+    return jsonify(rate_limiter.stats())
+
+@app.route("/admin/profiler", methods=["GET", "POST"])
+@admin_only
+def profiler_admin():
+    settings = profiler.settings()
+    form = ProfilerForm(
+        enabled=settings["enabled"],
+        sample_rate=settings["sample_rate"],
+        endpoints=", ".join(settings["endpoints"])
+    )
+    if form.validate_on_submit():
+        profiler.update(
+            enabled=form.enabled.data,
+            sample_rate=form.sample_rate.data or 0.0,
+            endpoints=[e.strip() for e in (form.endpoints.data or "").split(",")]
+        )
+        flash("Profiler settings saved.")
+        return redirect(url_for("profiler_admin"))
+
+    selected_endpoint = request.args.get("route") or None
+    return render_template(
+        "admin-profiler.html",
+        form=form,
+        profiles=profiler.profiles(),
+        hotspots=profiler.hotspots(selected_endpoint),
+        selected_endpoint=selected_endpoint,
+        endpoints=sorted(e for e in app.view_functions if e != "static"),
+        current_user=current_user
+    )
+
+@app.route("/admin/most-read")
+@admin_only
+@read_only
+def most_read():
+    limit = request.args.get("limit", 10, type=int)
+    return jsonify([
+        {"id": p.id, "slug": p.slug, "title": p.title, "views": p.views}
+        for p in most_read_posts(min(max(limit, 1), 100))
+    ])
 
 @app.route("/logout")
 def logout():
@@ -700,6 +1406,7 @@ def about():
     return render_template("about.html", current_user=current_user)
 
 @app.route("/contact", methods=["GET", "POST"])
+@rate_limited("contact")
 def contact():
     form = ContactForm()
 
@@ -732,6 +1439,7 @@ def privacy():
     return render_template("privacy.html")
 
 @app.route("/sitemap.xml")
+@read_only
 def sitemap():
     """Return a simple XML sitemap for search engines."""
     today = date.today().isoformat()
@@ -787,6 +1495,55 @@ def favicon():
     return redirect(url_for("static", filename="assets/favicons/favicon.ico"))
 
 
+# CLI
+@app.cli.command("rebuild-related")
+def rebuild_related_command():
+    """Recompute related posts for every post (run after bulk imports)."""
+    count = rebuild_related_posts()
+    db.session.commit()
+    print(f"Related posts rebuilt for {count} posts.")
+
+@app.cli.command("rerender-posts")
+@click.option("--all", "rerender_all", is_flag=True, help="Re-render every post, not only stale ones.")
+def rerender_posts_command(rerender_all):
+    """Re-run render_post_body() over stored posts (after BODY_RENDER_VERSION changes)."""
+    query = db.select(BlogPost)
+    if not rerender_all:
+        query = query.where(or_(
+            BlogPost.body_render_version.is_(None),
+            BlogPost.body_render_version != BODY_RENDER_VERSION
+        ))
+    count = 0
+    for post in db.session.scalars(query):
+        apply_rendered_body(post)
+        count += 1
+    db.session.commit()
+    print(f"Re-rendered {count} posts.")
+
+@app.cli.command("most-read")
+@click.option("--limit", default=10, show_default=True)
+@click.option("--urls", is_flag=True, help="Print absolute post URLs (e.g. to warm a cache).")
+def most_read_command(limit, urls):
+    """List the most read posts."""
+    with app.test_request_context():
+        for post in most_read_posts(limit):
+            if urls:
+                print(url_for("show_post", slug=post.slug, _external=True))
+            else:
+                print(f"{post.views:>8}  {post.slug}")
+
+@app.cli.command("delete-posts")
+@click.argument("post_ids", nargs=-1, type=int, required=True)
+@click.option("--yes", is_flag=True, help="Do not ask for confirmation.")
+def delete_posts_command(post_ids, yes):
+    """Delete posts by id in one transaction, then remove their files."""
+    if not yes:
+        click.confirm(f"Delete {len(post_ids)} post(s)? This cannot be undone.", abort=True)
+    deleted = delete_posts(post_ids)
+    file_cleanup.drain()
+    print(f"Deleted {len(deleted)} post(s) and removed their files.")
+
+
 from version import __version__
 
 @app.context_processor
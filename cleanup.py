@@ -0,0 +1,42 @@
+"""
+Background queue for filesystem cleanup that must only happen after a
+database commit (e.g. removing the images of deleted posts).
+"""
+import atexit
+import queue
+from workers import LazyWorkerThread
+
+
+class FileCleanupQueue:
+    def __init__(self, remove_fn):
+        self.remove_fn = remove_fn  # called with one queued item, must be idempotent
+        self._queue = queue.Queue()
+        self._worker = LazyWorkerThread(self._run, "file-cleanup")
+        atexit.register(self.drain)
+
+    def enqueue(self, items) -> None:
+        for item in items:
+            self._queue.put(item)
+        self._worker.ensure_started()
+
+    def drain(self) -> None:
+        """Process everything still queued in the calling thread and wait for in-flight items (CLI, shutdown)."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._process(item)
+        self._queue.join()
+
+    def _process(self, item) -> None:
+        try:
+            self.remove_fn(item)
+        except Exception as e:
+            print("FILE CLEANUP ERROR:", item, repr(e))
+        finally:
+            self._queue.task_done()
+
+    def _run(self) -> None:
+        while True:
+            self._process(self._queue.get())
@@ -1,5 +1,6 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, SubmitField, SelectMultipleField, HiddenField, TextAreaField, FieldList, FormField, IntegerField
+from wtforms import BooleanField, FloatField
 from wtforms.validators import DataRequired, URL, Optional
 from wtforms.validators import Email, Length, NumberRange
 from flask_ckeditor import CKEditorField
@@ -53,3 +54,23 @@ class CreatePostForm(FlaskForm):
     sources = FieldList(FormField(SourceItemForm), min_entries=10, max_entries=50)
 
     submit = SubmitField("Submit Post")
+
+# Admin toggle for the request profiler
+class ProfilerForm(FlaskForm):
+    enabled = BooleanField("Profiling enabled")
+    sample_rate = FloatField(
+        "Sample rate",
+        validators=[Optional(), NumberRange(min=0, max=1)],
+        description="Share of requests to profile (0 to 1)."
+    )
+    endpoints = StringField(
+        "Always profile endpoints",
+        validators=[Optional(), Length(max=500)],
+        description="Comma separated, e.g. show_post, filter_posts"
+    )
+    submit = SubmitField("Save")
+
+# Admin bulk delete (choices are filled in the view)
+class BulkDeleteForm(FlaskForm):
+    post_ids = MultiCheckboxField("Posts", coerce=int, validators=[DataRequired()])
+    submit = SubmitField("Delete selected")
@@ -0,0 +1,174 @@
+"""
+On-demand request profiler.
+
+When enabled (state shared across workers through a small JSON file), a
+sample of requests, or every request to selected endpoints, is profiled by a
+background thread that samples the request thread's stack. Each profile is
+written as a collapsed-stack file ("frame;frame;frame count" per line, ready
+for flamegraph.pl / speedscope) into a directory capped in total size.
+"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class _StackSampler(threading.Thread):
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack and not self._stop_event.is_set():
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> Counter:
+        self._stop_event.set()
+        self.join()
+        return self.stacks
+
+
+class RequestProfiler:
+    DEFAULTS = {"enabled": False, "sample_rate": 0.01, "endpoints": []}
+
+    def __init__(self, directory: str, state_path: str, max_bytes: int,
+                 interval: float = 0.001, refresh_seconds: float = 2.0):
+        self.directory = directory
+        self.state_path = state_path
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.refresh_seconds = refresh_seconds
+        self._settings = dict(self.DEFAULTS)
+        self._loaded_at = float("-inf")
+
+    # Settings (shared by all workers through state_path)
+    def settings(self) -> dict:
+        now = time.monotonic()
+        if now - self._loaded_at >= self.refresh_seconds:
+            self._loaded_at = now
+            try:
+                with open(self.state_path) as f:
+                    self._settings = {**self.DEFAULTS, **json.load(f)}
+            except (OSError, ValueError):
+                self._settings = dict(self.DEFAULTS)
+        return self._settings
+
+    def update(self, enabled: bool, sample_rate: float, endpoints: list[str]) -> None:
+        state = {
+            "enabled": bool(enabled),
+            "sample_rate": min(max(float(sample_rate), 0.0), 1.0),
+            "endpoints": [e for e in endpoints if e],
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+        self._settings, self._loaded_at = state, time.monotonic()
+
+    # Per request
+    def should_profile(self, endpoint: str | None) -> bool:
+        settings = self.settings()
+        if not settings["enabled"] or endpoint is None:
+            return False
+        if endpoint in settings["endpoints"]:
+            return True
+        return random.random() < settings["sample_rate"]
+
+    def start(self) -> _StackSampler:
+        sampler = _StackSampler(threading.get_ident(), self.interval)
+        sampler.start()
+        return sampler
+
+    def finish(self, sampler: _StackSampler, endpoint: str) -> None:
+        stacks = sampler.stop()
+        if not stacks:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        fname = f"{endpoint}.{time.strftime('%Y%m%d-%H%M%S')}.{os.getpid()}.{random.randrange(1 << 16):04x}.collapsed"
+        with open(os.path.join(self.directory, fname), "w") as f:
+            for stack, count in stacks.items():
+                f.write(f"{stack} {count}\n")
+        self._enforce_cap()
+
+    def _profile_files(self) -> list[os.DirEntry]:
+        try:
+            return [e for e in os.scandir(self.directory) if e.is_file() and e.name.endswith(".collapsed")]
+        except FileNotFoundError:
+            return []
+
+    def _enforce_cap(self) -> None:
+        """Delete the oldest profiles until the directory fits in max_bytes."""
+        files = []
+        for entry in self._profile_files():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    # Reporting
+    def profiles(self) -> dict[str, int]:
+        """Number of stored profiles per endpoint."""
+        return dict(Counter(e.name.split(".", 1)[0] for e in self._profile_files()))
+
+    def hotspots(self, endpoint: str | None = None, limit: int = 25) -> list[dict]:
+        """
+        Aggregate stored profiles into the frames with the most samples.
+        self = samples where the frame was on top of the stack, total = samples where it appeared at all.
+        """
+        own, inclusive = Counter(), Counter()
+        total_samples = 0
+        for entry in self._profile_files():
+            if endpoint and entry.name.split(".", 1)[0] != endpoint:
+                continue
+            try:
+                with open(entry.path) as f:
+                    for line in f:
+                        stack, _, count = line.rstrip("\n").rpartition(" ")
+                        if not stack or not count.isdigit():
+                            continue
+                        n = int(count)
+                        frames = stack.split(";")
+                        total_samples += n
+                        own[frames[-1]] += n
+                        for frame in set(frames):
+                            inclusive[frame] += n
+            except OSError:
+                continue
+
+        if not total_samples:
+            return []
+        return [
+            {
+                "frame": frame,
+                "self": n,
+                "self_pct": 100.0 * n / total_samples,
+                "total_pct": 100.0 * inclusive[frame] / total_samples,
+            }
+            for frame, n in own.most_common(limit)
+        ]
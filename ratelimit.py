@@ -0,0 +1,147 @@
+"""
+Token-bucket rate limiting shared by all worker processes.
+
+Bucket state lives in a small SQLite file next to the app, so every gunicorn
+worker sees the same counters without an external service.
+"""
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class RatePolicy:
+    capacity: int        # burst size (max tokens)
+    per_seconds: float   # time to refill an empty bucket
+
+    @property
+    def refill_rate(self) -> float:
+        return self.capacity / self.per_seconds
+
+    @classmethod
+    def parse(cls, spec: str) -> "RatePolicy":
+        """Parse a policy like "5/60" (5 requests per 60 seconds)."""
+        try:
+            capacity, seconds = spec.split("/", 1)
+            policy = cls(int(capacity), float(seconds))
+        except ValueError:
+            raise ValueError(f"Invalid rate limit policy: {spec!r} (expected '<count>/<seconds>')")
+        if policy.capacity < 1 or policy.per_seconds <= 0:
+            raise ValueError(f"Invalid rate limit policy: {spec!r}")
+        return policy
+
+
+class TokenBucketLimiter:
+    """Per (route, key) token buckets stored in SQLite, plus allowed/rejected counters per route."""
+
+    PRUNE_EVERY = 500  # hits per process between cleanups of idle (full) buckets
+
+    def __init__(self, path: str, policies: dict[str, RatePolicy]):
+        self.path = path
+        self.policies = policies
+        self._local = threading.local()
+        self._hits = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._init_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        # A connection must not be used across fork() (gunicorn --preload): reconnect in a new process
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=2, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _init_schema(self) -> None:
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " route TEXT NOT NULL, key TEXT NOT NULL,"
+            " tokens REAL NOT NULL, updated REAL NOT NULL,"
+            " PRIMARY KEY (route, key))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS metrics ("
+            " route TEXT PRIMARY KEY,"
+            " allowed INTEGER NOT NULL DEFAULT 0,"
+            " rejected INTEGER NOT NULL DEFAULT 0,"
+            " since REAL NOT NULL)"
+        )
+
+    def hit(self, route: str, key: str) -> tuple[bool, float]:
+        """
+        Take one token from the (route, key) bucket.
+        Returns (allowed, retry_after_seconds). Fails open if the store is unavailable.
+        """
+        policy = self.policies.get(route)
+        if policy is None:
+            return True, 0.0
+
+        now = time.time()
+        try:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT tokens, updated FROM buckets WHERE route = ? AND key = ?",
+                    (route, key)
+                ).fetchone()
+                tokens = float(policy.capacity)
+                if row:
+                    tokens = min(tokens, row[0] + (now - row[1]) * policy.refill_rate)
+
+                allowed = tokens >= 1.0
+                if allowed:
+                    tokens -= 1.0
+                retry_after = 0.0 if allowed else (1.0 - tokens) / policy.refill_rate
+
+                conn.execute(
+                    "INSERT INTO buckets (route, key, tokens, updated) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (route, key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                    (route, key, tokens, now)
+                )
+                column = "allowed" if allowed else "rejected"
+                conn.execute(
+                    f"INSERT INTO metrics (route, {column}, since) VALUES (?, 1, ?) "
+                    f"ON CONFLICT (route) DO UPDATE SET {column} = {column} + 1",
+                    (route, now)
+                )
+                self._maybe_prune(conn, now)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            return True, 0.0
+
+        return allowed, retry_after
+
+    def _maybe_prune(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop buckets idle long enough to be full again (same as having no row)."""
+        self._hits += 1
+        if self._hits % self.PRUNE_EVERY:
+            return
+        for route, policy in self.policies.items():
+            conn.execute(
+                "DELETE FROM buckets WHERE route = ? AND updated < ?",
+                (route, now - policy.per_seconds)
+            )
+
+    def stats(self) -> dict:
+        """Allowed/rejected counters per route, with the configured policy."""
+        rows = self._conn().execute("SELECT route, allowed, rejected, since FROM metrics").fetchall()
+        counters = {route: (allowed, rejected, since) for route, allowed, rejected, since in rows}
+        result = {}
+        for route, policy in self.policies.items():
+            allowed, rejected, since = counters.get(route, (0, 0, None))
+            result[route] = {
+                "policy": f"{policy.capacity}/{policy.per_seconds:g}",
+                "allowed": allowed,
+                "rejected": rejected,
+                "since": since,
+            }
+        return result
@@ -0,0 +1,111 @@
+"""
+Production DB profile: readers on the "read" bind are not blocked by an open write.
+
+app.py reads its configuration at import time, so the module is imported
+fresh under a temporary environment and removed from sys.modules afterwards.
+"""
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+BUSY_TIMEOUT_MS = 5000
+WRITE_HOLD_SECONDS = 2.0
+
+
+@pytest.fixture(scope="module")
+def wf():
+    tmp = tempfile.mkdtemp(prefix="wf-db-profile-")
+    previous_app = sys.modules.pop("app", None)
+    try:
+        with pytest.MonkeyPatch.context() as mp:
+            for name, value in {
+                "DB_URI": f"sqlite:///{os.path.join(tmp, 'posts.db')}",
+                "DB_PROFILE": "production",
+                "SQLITE_BUSY_TIMEOUT_MS": str(BUSY_TIMEOUT_MS),
+                "FLASK_KEY": "test",
+                "RATE_LIMIT_DB": os.path.join(tmp, "ratelimit.db"),
+                "PROFILE_DIR": os.path.join(tmp, "profiles"),
+                "VIEW_COUNTING": "false",
+            }.items():
+                mp.setenv(name, value)
+            wf = importlib.import_module("app")
+
+            with wf.app.app_context():
+                user = wf.User(email="admin@example.com", password="x", name="Admin")
+                wf.db.session.add(user)
+                for i in range(3):
+                    wf.db.session.add(wf.BlogPost(
+                        title=f"Post {i}", subtitle="Sub", date="Jan 01, 2026",
+                        body=f"<p>Body {i}</p>", img_url="/x.webp", slug=f"post-{i}", author=user
+                    ))
+                wf.db.session.commit()
+            yield wf
+
+            with wf.app.app_context():
+                for engine in wf.db.engines.values():
+                    engine.dispose()
+    finally:
+        sys.modules.pop("app", None)
+        if previous_app is not None:
+            sys.modules["app"] = previous_app
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_production_profile_configures_sqlite(wf):
+    with wf.app.app_context():
+        assert "read" in wf.db.engines
+        with wf.db.engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == BUSY_TIMEOUT_MS
+
+
+def test_readers_not_blocked_by_open_write(wf):
+    write_open = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def writer():
+        try:
+            with wf.app.app_context():
+                post = wf.db.session.query(wf.BlogPost).filter_by(slug="post-0").one()
+                post.subtitle = "Changed"
+                wf.db.session.flush()  # holds the SQLite write lock until commit
+                write_open.set()
+                release.wait(WRITE_HOLD_SECONDS)
+                wf.db.session.commit()
+        except Exception as e:
+            errors.append(e)
+            write_open.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        assert write_open.wait(5)
+        client = wf.app.test_client()
+        for path in ("/", "/post-0", "/post-1"):
+            started = time.perf_counter()
+            response = client.get(path)
+            elapsed = time.perf_counter() - started
+            assert response.status_code == 200
+            assert elapsed < BUSY_TIMEOUT_MS / 1000 / 4, f"{path} waited {elapsed:.2f}s"
+            assert b"Changed" not in response.data  # uncommitted write is not visible
+    finally:
+        release.set()
+        thread.join()
+    assert not errors
+
+
+def test_read_engine_rejects_writes(wf):
+    with wf.app.app_context():
+        with wf.db.engines["read"].connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.exec_driver_sql(
+                    "INSERT INTO categories (name) VALUES ('should-fail')"
+                )
@@ -0,0 +1,91 @@
+"""
+Multipart parsing for large uploads.
+
+Every uploaded file part is written in chunks straight to a temp file on
+disk, and per-field size limits are enforced while the body is still being
+received, so an oversized upload is rejected early with a 413 instead of
+being read in full first.
+"""
+import tempfile
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.formparser import FormDataParser, MultiPartParser
+
+
+class LimitedSpool:
+    """Disk-backed temp file that refuses to grow past `limit` bytes."""
+
+    def __init__(self, field: str, limit: int | None, spool_dir: str | None = None):
+        self.field = field
+        self.limit = limit
+        self.size = 0
+        self._file = tempfile.TemporaryFile("w+b", dir=spool_dir)
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.limit is not None and self.size > self.limit:
+            self._file.close()
+            raise RequestEntityTooLarge(
+                f"The uploaded file for '{self.field}' is too large "
+                f"(limit {self.limit / (1024 * 1024):.3g} MB)."
+            )
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        # read/seek/tell/close/fileno... go to the underlying file
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+class _LimitedMultiPartParser(MultiPartParser):
+    field_limits: dict[str, int] = {}
+    default_limit: int | None = None
+    spool_dir: str | None = None
+
+    def start_file_streaming(self, event, total_content_length):
+        limit = self.field_limits.get(event.name, self.default_limit)
+        return LimitedSpool(event.name, limit, self.spool_dir)
+
+
+class _LimitedFormDataParser(FormDataParser):
+    field_limits: dict[str, int] = {}
+    default_limit: int | None = None
+    spool_dir: str | None = None
+
+    def _parse_multipart(self, stream, mimetype, content_length, options):
+        parser = _LimitedMultiPartParser(
+            stream_factory=self.stream_factory,
+            max_form_memory_size=self.max_form_memory_size,
+            max_form_parts=self.max_form_parts,
+            cls=self.cls,
+        )
+        parser.field_limits = self.field_limits
+        parser.default_limit = self.default_limit
+        parser.spool_dir = self.spool_dir
+
+        boundary = options.get("boundary", "").encode("ascii")
+        if not boundary:
+            raise ValueError("Missing boundary")
+
+        form, files = parser.parse(stream, boundary, content_length)
+        return stream, form, files
+
+
+class SpooledUploadRequest(Request):
+    """
+    Request class using the limited parser. Configured through:
+    - UPLOAD_FIELD_LIMITS: {field name: max bytes}
+    - UPLOAD_DEFAULT_LIMIT: max bytes for any other file field (None = only MAX_CONTENT_LENGTH)
+    - UPLOAD_SPOOL_DIR: temp directory for spooled parts (None = system default)
+    """
+    form_data_parser_class = _LimitedFormDataParser
+
+    def make_form_data_parser(self) -> FormDataParser:
+        parser = super().make_form_data_parser()
+        config = current_app.config
+        parser.field_limits = config.get("UPLOAD_FIELD_LIMITS", {})
+        parser.default_limit = config.get("UPLOAD_DEFAULT_LIMIT")
+        parser.spool_dir = config.get("UPLOAD_SPOOL_DIR")
+        return parser
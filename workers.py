@@ -0,0 +1,27 @@
+"""
+Background worker threads for per-process buffers and queues.
+"""
+import os
+import threading
+
+
+class LazyWorkerThread:
+    """
+    Runs `target` on a daemon thread, started the first time it is needed in
+    each process. Threads do not survive a fork, so a gunicorn worker forked
+    from a parent that already started one gets its own on first use.
+    """
+
+    def __init__(self, target, name: str):
+        self.target = target
+        self.name = name
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def ensure_started(self) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self.target, name=self.name, daemon=True).start()